@@ -0,0 +1,22 @@
+import click
+from flask.cli import with_appcontext
+from app import db
+from app.models import User
+
+
+# This decorator registers a new command 'set-password' with Flask
+@click.command('set-password')
+@click.argument('email')
+@click.password_option()
+@click.option('--admin', is_flag=True, help='Also make the user an administrator.')
+@with_appcontext
+def set_password_command(email, password, admin):
+    """Sets a user's password, for example after importing users without one."""
+    user = User.query.filter_by(email=email).first()
+    if user is None:
+        raise click.ClickException(f'No user with the email {email}.')
+    user.set_password(password)
+    if admin:
+        user.is_admin = True
+    db.session.commit()
+    click.echo(f'Password set for {user.username}.')
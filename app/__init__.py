@@ -1,13 +1,13 @@
 #from flask_markdown import Markdown
 # Import the main Flask class and other necessary libraries.
 import os
-from flask import Flask
+from flask import Flask, current_app
 from config import Config
 from flask_sqlalchemy import SQLAlchemy
-from flask_migrate import Migrate
 from flask_login import LoginManager
 from sqlalchemy import MetaData
 from flask_mail import Mail # <-- Import Mail
+from app.ratelimit import RateLimiter
 
 
 
@@ -24,14 +24,22 @@ naming_convention = {
 # --- Initialize Extensions ---
 # Pass the naming convention to SQLAlchemy
 db = SQLAlchemy(metadata=MetaData(naming_convention=naming_convention))
-migrate = Migrate()
 login_manager = LoginManager()
 login_manager.login_view = 'auth.login'
 # --- ADD THIS LINE ---
 login_manager.login_message_category = 'danger'
 mail = Mail() # <-- Create a Mail instance
+limiter = RateLimiter()
 
 
+# --- Deferred Flask-Migrate Setup ---
+# Flask-Migrate imports all of Alembic, which is the single slowest import in
+# the app. It is only needed for 'flask db ...' commands, so it is initialised
+# the first time one of those commands runs instead of in every web worker.
+def init_migrate():
+    from flask_migrate import Migrate
+    Migrate(current_app._get_current_object(), db)
+
 
 
 # --- Application Factory Function ---
@@ -41,13 +49,22 @@ def create_app(config_class=Config):
     """
     app = Flask(__name__)
     app.config.from_object(config_class)
+    # Trust X-Forwarded-For from our own proxies, so request.remote_addr
+    # (used e.g. by the rate limiter) is the real client IP.
+    if app.config['TRUSTED_PROXY_COUNT']:
+        from werkzeug.middleware.proxy_fix import ProxyFix
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=app.config['TRUSTED_PROXY_COUNT'])
     # --- NEW: Initialize Markdown with the app ---
     #Markdown(app)
     # --- Initialize Flask Extensions with the App ---
     db.init_app(app)
-    migrate.init_app(app, db)
     login_manager.init_app(app)
     mail.init_app(app) # <-- Initialize Mail with the app
+    limiter.init_app(app)
+
+    # --- Register CLI Commands ---
+    from app.cli import LazyGroup
+    app.cli.add_command(LazyGroup('db', 'flask_migrate.cli:db', on_load=init_migrate))
 
     # --- Register Blueprints ---
     from app.routes import bp as main_bp
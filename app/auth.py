@@ -1,9 +1,8 @@
 # Import the Blueprint class from Flask.
 from functools import wraps
-from flask import Blueprint, render_template, flash, redirect, url_for, request, abort
+from flask import Blueprint, render_template, flash, redirect, url_for, request, abort, current_app
 from flask_login import login_user, logout_user, current_user
 from app import db
-from app.forms import RegistrationForm, LoginForm
 from app.models import User
 
 
@@ -19,7 +18,8 @@ def admin_required(f):
     def decorated_function(*args, **kwargs):
         if not current_user.is_admin:
             abort(403)  # Forbidden
-        return f(*args, **kwargs)
+        # ensure_sync lets this wrap async views as well as normal ones.
+        return current_app.ensure_sync(f)(*args, **kwargs)
     return decorated_function
 
 # --- NEW LOGIN ROUTE ---
@@ -30,6 +30,7 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('main.index'))
     
+    from app.forms import LoginForm
     form = LoginForm()
     if form.validate_on_submit():
         # Find the user by their email address.
@@ -64,6 +65,7 @@ def logout():
 @bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Handle user registration."""
+    from app.forms import RegistrationForm
     form = RegistrationForm()
     if form.validate_on_submit():
         # Create a new user instance
@@ -0,0 +1,83 @@
+# A small in-process cache for values that are expensive to compute but
+# change rarely (e.g. the careers page facet counts and home page fragments).
+import time
+from threading import Lock
+from flask import render_template
+from markupsafe import Markup
+
+
+class Cache:
+    """
+    A dictionary cache with per-key expiry.
+    Each gunicorn worker has its own copy, so values should also have a
+    timeout to bound how stale they can get in the other workers.
+    """
+    def __init__(self):
+        self._data = {}
+        self._lock = Lock()
+        # Hit/miss counters per key, exposed through stats() for tuning.
+        self._stats = {}
+
+    def get(self, key):
+        """Returns the cached value, or None if it is missing or expired."""
+        with self._lock:
+            counters = self._stats.setdefault(key, {'hits': 0, 'misses': 0})
+            item = self._data.get(key)
+            if item is not None:
+                value, expires = item
+                if expires is None or expires >= time.monotonic():
+                    counters['hits'] += 1
+                    return value
+                del self._data[key]
+            counters['misses'] += 1
+            return None
+
+    def set(self, key, value, timeout=None):
+        """Stores a value. A timeout of None means it never expires."""
+        expires = time.monotonic() + timeout if timeout else None
+        with self._lock:
+            self._data[key] = (value, expires)
+
+    def get_or_set(self, key, func, timeout=None):
+        """Returns the cached value, computing and storing it with func() if needed."""
+        value = self.get(key)
+        if value is None:
+            value = func()
+            self.set(key, value, timeout)
+        return value
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def _is_fresh(self, key, now):
+        item = self._data.get(key)
+        return item is not None and (item[1] is None or item[1] >= now)
+
+    def stats(self):
+        """Returns hit/miss counts per key and whether each key is currently cached."""
+        now = time.monotonic()
+        with self._lock:
+            return {
+                key: dict(counters, cached=self._is_fresh(key, now))
+                for key, counters in self._stats.items()
+            }
+
+
+cache = Cache()
+
+
+def cached_fragment(key, template_name, context_func=None, timeout=None):
+    """
+    Renders a template fragment and caches the HTML under 'key'.
+    'context_func' is only called on a cache miss, so any queries it runs
+    are skipped while the fragment is cached.
+    """
+    def render():
+        context = context_func() if context_func is not None else {}
+        return Markup(render_template(template_name, **context))
+    return cache.get_or_set(key, render, timeout)
@@ -0,0 +1,83 @@
+# Helpers for registering CLI commands without importing them up front.
+import importlib
+import click
+
+
+def _import_string(import_path):
+    """Imports an object given as 'module.path:attribute'."""
+    module_name, attr = import_path.split(':')
+    return getattr(importlib.import_module(module_name), attr)
+
+
+class LazyCommand(click.Command):
+    """
+    A placeholder for a click command that is only imported when it is run
+    (or its help is shown, so the help text only lives in the command).
+    Web workers never invoke CLI commands, so they never pay for the import.
+    """
+    def __init__(self, name, import_path):
+        super().__init__(name)
+        self.import_path = import_path
+        self._command = None
+
+    def _load(self):
+        if self._command is None:
+            self._command = _import_string(self.import_path)
+        return self._command
+
+    def get_short_help_str(self, limit=45):
+        return self._load().get_short_help_str(limit)
+
+    def get_help(self, ctx):
+        return self._load().get_help(ctx)
+
+    def get_params(self, ctx):
+        return self._load().get_params(ctx)
+
+    def invoke(self, ctx):
+        return self._load().invoke(ctx)
+
+
+class LazyGroup(click.Group):
+    """
+    Same as LazyCommand, but for a command group (e.g. 'flask db').
+    'on_load' is called once before the real group is imported, which lets
+    the matching Flask extension be initialised only when it is needed.
+    """
+    def __init__(self, name, import_path, on_load=None):
+        super().__init__(name)
+        self.import_path = import_path
+        self.on_load = on_load
+        self._group = None
+        self._loaded = False
+
+    def _import(self):
+        if self._group is None:
+            self._group = _import_string(self.import_path)
+        return self._group
+
+    def _load(self):
+        if not self._loaded:
+            if self.on_load is not None:
+                self.on_load()
+            self._loaded = True
+        return self._import()
+
+    def get_short_help_str(self, limit=45):
+        # Listing the help of 'flask' only needs the group, not on_load.
+        return self._import().get_short_help_str(limit)
+
+    def get_help(self, ctx):
+        return self._import().get_help(ctx)
+
+    def get_params(self, ctx):
+        return self._load().get_params(ctx)
+
+    def list_commands(self, ctx):
+        return self._load().list_commands(ctx)
+
+    def get_command(self, ctx, cmd_name):
+        return self._load().get_command(ctx, cmd_name)
+
+    def invoke(self, ctx):
+        return self._load().invoke(ctx)
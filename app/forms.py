@@ -1,4 +1,5 @@
 # Import necessary classes from Flask-WTF and WTForms.
+from flask import current_app
 from flask_wtf import FlaskForm
 # Import the FileField and validators for it
 from flask_wtf.file import FileField, FileAllowed
@@ -88,6 +89,30 @@ class PostForm(FlaskForm):
     
     submit = SubmitField('Submit Post')
 
+    def validate_image_upload(self, image_upload):
+        """
+        Custom validator that checks the real image format and size.
+        Image.open() only reads the header, so oversized images (including
+        decompression bombs) are rejected without decoding any pixels.
+        """
+        if not image_upload.data:
+            return
+        from PIL import Image
+        try:
+            with Image.open(image_upload.data) as img:
+                image_format = img.format
+                width, height = img.size
+        except Image.DecompressionBombError:
+            raise ValidationError('This image is too large.')
+        except OSError:
+            raise ValidationError('This file is not a valid image.')
+        finally:
+            image_upload.data.seek(0)
+        if image_format not in ('JPEG', 'PNG', 'GIF'):
+            raise ValidationError('Images only!')
+        if width * height > current_app.config['MAX_IMAGE_PIXELS']:
+            raise ValidationError(f'This image is too large ({width}x{height} pixels).')
+
 
 # --- NEW JOB FORM ---
 class JobForm(FlaskForm):
@@ -99,3 +124,26 @@ class JobForm(FlaskForm):
     submit = SubmitField('Submit Job Posting')
 
 
+# --- ADMIN BULK ACTION FORMS ---
+# The selected row ids are plain checkboxes in the admin.html tables.
+class BulkPostActionForm(FlaskForm):
+    """Form for admins to apply one action to many posts at once."""
+    action = SelectField('Action', choices=[
+        ('archive', 'Archive'),
+        ('restore', 'Restore from archive'),
+        ('reassign', 'Reassign author'),
+        ('delete', 'Delete')
+    ])
+    # Choices are filled in by the view from the list of users.
+    author = SelectField('New author', coerce=int)
+    submit = SubmitField('Apply to Selected Posts')
+
+
+class BulkJobActionForm(FlaskForm):
+    """Form for admins to apply one action to many job postings at once."""
+    action = SelectField('Action', choices=[
+        ('archive', 'Archive'),
+        ('restore', 'Restore from archive'),
+        ('delete', 'Delete')
+    ])
+    submit = SubmitField('Apply to Selected Jobs')
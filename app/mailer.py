@@ -0,0 +1,43 @@
+# Sending email from async views without blocking on SMTP.
+import asyncio
+from email.message import EmailMessage
+from flask import current_app
+from app import mail
+
+
+async def send_email(subject, recipients, body, sender=None):
+    """
+    Sends one plain-text email.
+    Uses the async aiosmtplib client when it is installed, so several emails
+    can be in flight at once. Without it, or when Flask-Mail is suppressing
+    sends (e.g. when testing), Flask-Mail is run in a worker thread instead.
+    """
+    config = current_app.config
+    sender = sender or config['MAIL_USERNAME']
+    try:
+        import aiosmtplib
+    except ImportError:
+        aiosmtplib = None
+
+    if aiosmtplib is None or current_app.extensions['mail'].suppress:
+        from flask_mail import Message
+        msg = Message(subject=subject, sender=sender, recipients=recipients, body=body)
+        await asyncio.to_thread(mail.send, msg)
+        return
+
+    message = EmailMessage()
+    message['Subject'] = subject
+    message['From'] = sender
+    message['To'] = ', '.join(recipients)
+    message.set_content(body)
+    # Like Flask-Mail, only log in when both a username and password are set.
+    login = config['MAIL_USERNAME'] and config['MAIL_PASSWORD']
+    await aiosmtplib.send(
+        message,
+        hostname=config['MAIL_SERVER'],
+        port=config['MAIL_PORT'],
+        start_tls=config['MAIL_USE_TLS'],
+        username=config['MAIL_USERNAME'] if login else None,
+        password=config['MAIL_PASSWORD'] if login else None,
+        timeout=config['MAIL_TIMEOUT']
+    )
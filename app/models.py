@@ -23,6 +23,9 @@ class User(UserMixin, db.Model):
 
     def check_password(self, password):
         """Checks if the submitted password matches the hashed one."""
+        # Users without a password (e.g. from an old export) cannot log in.
+        if self.password_hash is None:
+            return False
         return check_password_hash(self.password_hash, password)
 
     def __repr__(self):
@@ -42,18 +45,46 @@ class Post(db.Model):
     image_file = db.Column(db.String(120), nullable=False, default='https://img.freepik.com/free-photo/technology-communication-icons-symbols-concept_53876-120314.jpg')
     # This will store the URL-friendly version of the title.
     slug = db.Column(db.String(140), unique=True, nullable=False)
+    # Archived posts are hidden from the public pages but kept in the database.
+    archived = db.Column(db.Boolean, nullable=False, default=False)
+    # Precomputed by app/related.py when the post is saved:
+    # estimated minutes to read, and [[post id, similarity], ...] best first.
+    reading_time = db.Column(db.Integer)
+    related_posts = db.Column(db.JSON)
     
     def __repr__(self):
         return f'<Post {self.title}>'
+
+
+# --- RELATED POSTS INDEX ---
+# Written by app/related.py. Together they are an inverted index, so the
+# posts similar to one post can be found without loading all the others.
+class Term(db.Model):
+    """A word used in more than one post, and how many posts use it."""
+    term = db.Column(db.String(64), primary_key=True)
+    document_frequency = db.Column(db.Integer, nullable=False)
+
+
+class PostTerm(db.Model):
+    """One of a post's most distinctive words, with its TF-IDF weight."""
+    post_id = db.Column(db.Integer, db.ForeignKey('post.id'), primary_key=True)
+    term = db.Column(db.String(64), primary_key=True, index=True)
+    weight = db.Column(db.Float, nullable=False)
     
 
 # --- NEW JOB MODEL ---
 class Job(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(140), nullable=False)
-    location = db.Column(db.String(100), nullable=False)
-    job_type = db.Column(db.String(50), nullable=False, default='Full-time')
+    location = db.Column(db.String(100), index=True, nullable=False)
+    job_type = db.Column(db.String(50), index=True, nullable=False, default='Full-time')
     description = db.Column(db.Text, nullable=False)
+    # The start of the description, for listings that only show a teaser.
+    # It is a little longer than the truncate(100) the templates apply, so
+    # the rendered text is the same as truncating the full description.
+    summary = db.column_property(db.func.substr(description, 1, 110), deferred=True)
+    # Archived jobs are hidden from the public pages but kept in the database.
+    archived = db.Column(db.Boolean, nullable=False, default=False)
 
     def __repr__(self):
         return f'<Job {self.title}>'
\ No newline at end of file
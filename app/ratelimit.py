@@ -0,0 +1,148 @@
+# Rate limiting for endpoints that are expensive or easy to abuse
+# (e.g. the contact form sends two emails, registration hashes a password).
+import math
+import os
+import sqlite3
+import threading
+import time
+from flask import current_app, request
+from werkzeug.exceptions import TooManyRequests
+
+
+class MemoryStore:
+    """Keeps counters in this process. Only correct with a single worker."""
+    def __init__(self):
+        # (key, window_start) -> [count, time after which it is no longer needed]
+        self._counts = {}
+        self._lock = threading.Lock()
+        self._next_prune = 0
+
+    def hit(self, key, window, now, check):
+        """
+        Reads the counts for the current and previous windows, passes them
+        to check(previous, current), and increments the current window
+        only if check() allows the request. Returns what check() returned.
+        """
+        current_start = int(now // window) * window
+        with self._lock:
+            if now >= self._next_prune:
+                self._counts = {k: v for k, v in self._counts.items() if v[1] > now}
+                self._next_prune = now + 60
+            previous = self._counts.get((key, current_start - window), [0])[0]
+            entry = self._counts.setdefault((key, current_start), [0, current_start + 2 * window])
+            retry_after = check(previous, entry[0])
+            if not retry_after:
+                entry[0] += 1
+            return retry_after
+
+
+class SQLiteStore:
+    """
+    Keeps counters in a SQLite file shared by all gunicorn workers on the
+    same machine. Each check-and-increment runs in one write transaction.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._next_prune = 0
+        conn = sqlite3.connect(self.path, timeout=5)
+        with conn:
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS rate_limit ('
+                'key TEXT NOT NULL, window_start INTEGER NOT NULL, count INTEGER NOT NULL, '
+                'expires REAL NOT NULL, PRIMARY KEY (key, window_start))'
+            )
+        conn.close()
+
+    def _connect(self):
+        # One connection per thread, and a new one after gunicorn forks a worker.
+        if getattr(self._local, 'pid', None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return self._local.conn
+
+    def hit(self, key, window, now, check):
+        """Same as MemoryStore.hit, but shared between processes."""
+        current_start = int(now // window) * window
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if now >= self._next_prune:
+                conn.execute('DELETE FROM rate_limit WHERE expires <= ?', (now,))
+                self._next_prune = now + 60
+            rows = dict(conn.execute(
+                'SELECT window_start, count FROM rate_limit WHERE key = ? AND window_start >= ?',
+                (key, current_start - window)
+            ).fetchall())
+            retry_after = check(rows.get(current_start - window, 0), rows.get(current_start, 0))
+            if not retry_after:
+                conn.execute(
+                    'INSERT INTO rate_limit (key, window_start, count, expires) VALUES (?, ?, 1, ?) '
+                    'ON CONFLICT (key, window_start) DO UPDATE SET count = count + 1',
+                    (key, current_start, current_start + 2 * window)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return retry_after
+
+
+def sliding_window_retry_after(limit, window, elapsed, previous, current):
+    """
+    Sliding window counter: the request count over the last 'window' seconds
+    is estimated as the previous window's count, weighted by how much of it
+    still overlaps, plus the current window's count.
+    Returns 0 if one more request is allowed, otherwise the number of
+    seconds until it will be.
+    """
+    remaining = window - elapsed
+    if previous * remaining / window + current < limit:
+        return 0
+    if current < limit:
+        # Wait until enough of the previous window has slid out.
+        wait = remaining - (limit - current) * window / previous
+    else:
+        # Wait for the next window, and then for enough of this one to slide out.
+        wait = remaining + window * (1 - limit / current)
+    return max(1, math.ceil(wait))
+
+
+class RateLimiter:
+    """
+    Applies the limits in the RATELIMITS config setting, which maps an
+    endpoint name to (max requests, window in seconds), per client IP
+    (see TRUSTED_PROXY_COUNT when running behind a proxy).
+    Only POST requests count, and they are rejected with 429 and a
+    Retry-After header before the view (and its form handling) runs.
+    """
+    def __init__(self, app=None):
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        # Each app keeps its own counters, like other Flask extensions.
+        if app.config['RATELIMIT_STORAGE'] == 'sqlite':
+            app.extensions['ratelimit'] = SQLiteStore(app.config['RATELIMIT_SQLITE_PATH'])
+        else:
+            app.extensions['ratelimit'] = MemoryStore()
+        app.before_request(self.check_request)
+
+    def check_request(self):
+        if not current_app.config['RATELIMIT_ENABLED'] or request.method != 'POST':
+            return
+        rule = current_app.config['RATELIMITS'].get(request.endpoint)
+        if rule is None:
+            return
+        limit, window = rule
+        now = time.time()
+        elapsed = now - int(now // window) * window
+        retry_after = current_app.extensions['ratelimit'].hit(
+            f'{request.endpoint}:{request.remote_addr}', window, now,
+            lambda previous, current: sliding_window_retry_after(limit, window, elapsed, previous, current)
+        )
+        if retry_after:
+            current_app.logger.warning(f'Rate limit hit on {request.endpoint} by {request.remote_addr}')
+            raise TooManyRequests(retry_after=retry_after)
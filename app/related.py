@@ -0,0 +1,243 @@
+# Precomputed "related articles" and reading time for blog posts.
+# Similarity is the cosine of TF-IDF vectors of each post's title and text,
+# keeping only each post's most distinctive words. The vectors are stored in
+# the PostTerm table, which works as an inverted index: the posts similar to
+# one post are found by joining its rows with the other rows for the same
+# words, so saving a post only vectorises that post. Results are stored on
+# each Post, so showing a post never compares it with the others.
+import heapq
+import math
+import re
+from collections import Counter
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy.orm import aliased
+from app import db
+from app.models import Post, PostTerm, Term
+
+TAG_RE = re.compile(r'<[^>]+>')
+WORD_RE = re.compile(r'[a-z0-9]+')
+STOP_WORDS = frozenset("""
+    a about above after again against all also am an and any are as at be because been before being
+    below between both but by can could did do does doing down during each few for from further had
+    has have having he her here hers him his how i if in into is it its itself just me more most my
+    no nor not now of off on once only or other our ours out over own same she should so some such
+    than that the their theirs them then there these they this those through to too under until up
+    very was we were what when where which while who whom why will with would you your yours
+""".split())
+# Longest word kept, to fit the Term and PostTerm columns.
+MAX_TERM_LENGTH = 64
+# Posts per query when reading or writing many posts.
+CHUNK_SIZE = 500
+
+
+def _words(text):
+    return WORD_RE.findall(TAG_RE.sub(' ', text).lower())
+
+
+def reading_time(content):
+    """Minutes needed to read a post's content (at least one)."""
+    words = len(_words(content))
+    return max(1, math.ceil(words / current_app.config['READING_WORDS_PER_MINUTE']))
+
+
+def _term_counts(title, content):
+    """How often each word (other than stop words) is used in a post."""
+    # The title is counted twice so it weighs more than any one sentence.
+    words = _words(f'{title} {title} {content}')
+    return Counter(w for w in words if 2 < len(w) <= MAX_TERM_LENGTH and w not in STOP_WORDS)
+
+
+def _vector(counts, document_frequency, post_count):
+    """
+    Returns a post's TF-IDF vector as {term: weight}, normalised by the
+    length of the full vector, but keeping only the post's
+    RELATED_POSTS_TERMS_PER_POST highest-weighted terms that other posts
+    use too (those in document_frequency). Words no other post uses have
+    the highest weights, but could never match another post.
+    """
+    weights = {
+        term: math.log1p(count) * (math.log((1 + post_count) / (1 + document_frequency.get(term, 1))) + 1)
+        for term, count in counts.items()
+    }
+    norm = math.sqrt(sum(weight * weight for weight in weights.values())) or 1
+    shared = [(term, weight) for term, weight in weights.items() if term in document_frequency]
+    top = heapq.nlargest(current_app.config['RELATED_POSTS_TERMS_PER_POST'], shared, key=lambda item: item[1])
+    return {term: weight / norm for term, weight in top}
+
+
+def _chunks(items, size=CHUNK_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _post_batches(*columns, batch_size=CHUNK_SIZE):
+    """Yields lists of rows of every post, in id order, one batch at a time."""
+    last_id = 0
+    while True:
+        rows = db.session.query(Post.id, *columns).filter(Post.id > last_id) \
+            .order_by(Post.id).limit(batch_size).all()
+        if not rows:
+            return
+        yield rows
+        last_id = rows[-1].id
+
+
+def similarity_statement(post_ids, limit=None):
+    """
+    Selects (post id, other post id, cosine similarity) for the given posts
+    and every other post that shares at least one stored term with them.
+    With a limit, only the most similar 'limit' other posts are selected
+    for each post (ranked by the database, so the rest are never fetched).
+    """
+    mine, other = aliased(PostTerm), aliased(PostTerm)
+    score = db.func.sum(mine.weight * other.weight)
+    statement = db.select(mine.post_id, other.post_id.label('other_id'), score.label('score')) \
+        .join(other, other.term == mine.term) \
+        .where(mine.post_id.in_(post_ids), other.post_id != mine.post_id) \
+        .group_by(mine.post_id, other.post_id)
+    if limit is not None:
+        rank = db.func.row_number().over(partition_by=mine.post_id, order_by=score.desc())
+        ranked = statement.add_columns(rank.label('rank')).subquery()
+        statement = db.select(ranked.c.post_id, ranked.c.other_id, ranked.c.score).where(ranked.c.rank <= limit)
+    return statement
+
+
+def _similarities(post_ids, limit=None):
+    """Runs similarity_statement(), streaming the rows."""
+    return db.session.execute(similarity_statement(post_ids, limit).execution_options(yield_per=1000))
+
+
+def _top_k(scores, k):
+    """The k highest (post id, score) pairs as [[post id, score], ...], best first."""
+    return [[post_id, round(score, 4)] for post_id, score in heapq.nlargest(k, scores, key=lambda pair: pair[1])]
+
+
+def compute_all_related_posts(batch_size=CHUNK_SIZE):
+    """
+    Rebuilds the Term and PostTerm tables and recomputes the related posts
+    and reading time of every post. Posts are read in batches, so memory
+    grows with the number of distinct words and the batch size, not with
+    the number of posts.
+    """
+    k = current_app.config['RELATED_POSTS_COUNT']
+
+    # How many posts use each word. Words in one post only are not stored.
+    document_frequency = Counter()
+    post_count = 0
+    for rows in _post_batches(Post.title, Post.content, batch_size=batch_size):
+        for row in rows:
+            document_frequency.update(_term_counts(row.title, row.content).keys())
+        post_count += len(rows)
+    document_frequency = {term: df for term, df in document_frequency.items() if df > 1}
+    db.session.execute(db.delete(Term))
+    for terms in _chunks(list(document_frequency.items()), batch_size):
+        db.session.execute(Term.__table__.insert(), [{'term': t, 'document_frequency': df} for t, df in terms])
+
+    # Each post's vector and reading time.
+    db.session.execute(db.delete(PostTerm))
+    for rows in _post_batches(Post.title, Post.content, batch_size=batch_size):
+        term_rows = []
+        for row in rows:
+            vector = _vector(_term_counts(row.title, row.content), document_frequency, post_count)
+            term_rows.extend({'post_id': row.id, 'term': term, 'weight': weight} for term, weight in vector.items())
+        if term_rows:
+            db.session.execute(PostTerm.__table__.insert(), term_rows)
+        db.session.execute(db.update(Post), [
+            {'id': row.id, 'reading_time': reading_time(row.content)} for row in rows
+        ])
+
+    # The related posts, from the index, for one batch of posts at a time.
+    for rows in _post_batches(batch_size=batch_size):
+        best = {row.id: [] for row in rows}
+        for post_id, other_id, score in _similarities(list(best), limit=k):
+            best[post_id].append((other_id, score))
+        db.session.execute(db.update(Post), [
+            {'id': post_id, 'related_posts': _top_k(scores, k)} for post_id, scores in best.items()
+        ])
+    db.session.commit()
+    return post_count
+
+
+def _update_related_lists(post_id, scores, candidates):
+    """
+    Puts post_id into (or takes it out of) the related lists of the candidate
+    posts, where its score in 'scores' changes their top k.
+    """
+    k = current_app.config['RELATED_POSTS_COUNT']
+    changes = []
+    for chunk in _chunks(sorted(candidates)):
+        for other_id, old_related in db.session.query(Post.id, Post.related_posts).filter(Post.id.in_(chunk)):
+            old_related = old_related or []
+            related = [pair for pair in old_related if pair[0] != post_id]
+            score = round(scores.get(other_id, 0), 4)
+            was_listed = len(related) != len(old_related)
+            beats_weakest = len(related) < k or score > related[-1][1]
+            if (was_listed or beats_weakest) and score > 0:
+                related = sorted(related + [[post_id, score]], key=lambda pair: -pair[1])[:k]
+            elif not was_listed:
+                continue
+            changes.append({'id': other_id, 'related_posts': related})
+    if changes:
+        # One executemany UPDATE ... WHERE id = ? for all changed posts.
+        db.session.execute(db.update(Post), changes)
+
+
+def update_related_posts(post):
+    """
+    Updates the related posts after one post was created or edited.
+    Only this post is vectorised, using the stored document frequencies.
+    Its own list is recomputed, and it is added to (or removed from) the
+    lists of the posts that share a word with it, where its new score
+    changes their top k. Run 'flask compute-related-posts' now and then to
+    refresh everything, e.g. as document frequencies drift.
+    """
+    k = current_app.config['RELATED_POSTS_COUNT']
+    # Posts that could list this post share a word with its old vector.
+    candidates = {other_id for _, other_id, _ in _similarities([post.id])}
+
+    counts = _term_counts(post.title, post.content)
+    document_frequency = {}
+    for terms in _chunks(list(counts)):
+        document_frequency.update(db.session.query(Term.term, Term.document_frequency).filter(Term.term.in_(terms)))
+    post_count = db.session.query(db.func.count(Post.id)).scalar()
+    vector = _vector(counts, document_frequency, post_count)
+    db.session.execute(db.delete(PostTerm).where(PostTerm.post_id == post.id))
+    if vector:
+        db.session.execute(PostTerm.__table__.insert(), [
+            {'post_id': post.id, 'term': term, 'weight': weight} for term, weight in vector.items()
+        ])
+
+    scores = {other_id: score for _, other_id, score in _similarities([post.id])}
+    post.related_posts = _top_k(scores.items(), k)
+    post.reading_time = reading_time(post.content)
+    _update_related_lists(post.id, scores, candidates | scores.keys())
+    db.session.commit()
+
+
+def remove_related_posts(post_ids):
+    """
+    Takes posts that are about to be deleted out of the index and out of
+    other posts' related lists. The caller deletes the posts and commits.
+    """
+    deleted = set(post_ids)
+    candidates = {other_id for _, other_id, _ in _similarities(post_ids)} - deleted
+    changes = []
+    for chunk in _chunks(sorted(candidates)):
+        for other_id, old_related in db.session.query(Post.id, Post.related_posts).filter(Post.id.in_(chunk)):
+            related = [pair for pair in old_related or [] if pair[0] not in deleted]
+            if len(related) != len(old_related or []):
+                changes.append({'id': other_id, 'related_posts': related})
+    if changes:
+        db.session.execute(db.update(Post), changes)
+    db.session.execute(db.delete(PostTerm).where(PostTerm.post_id.in_(post_ids)))
+
+
+# This decorator registers a new command 'compute-related-posts' with Flask
+@click.command('compute-related-posts')
+@with_appcontext
+def compute_related_posts_command():
+    """Recomputes related posts and reading times for every blog post."""
+    count = compute_all_related_posts()
+    click.echo(f'Computed related posts for {count} posts.')
@@ -1,39 +1,95 @@
+import asyncio
 import os
 import secrets
-from PIL import Image
 from flask import render_template, flash, redirect, url_for, request, abort, current_app, jsonify, make_response
-from app import db, mail
-from app.forms import ContactForm, PostForm, JobForm
+from app import db
+from app.cache import cache, cached_fragment
+from app.related import update_related_posts, remove_related_posts
 from app.models import User, Post, Job
 from flask_login import current_user, login_required
 from app.auth import admin_required
 from flask import Blueprint
-from flask_mail import Message
 from datetime import datetime # <-- THIS LINE IS THE FIX
 
 
 bp = Blueprint('main', __name__)
 
+# NOTE: Pillow, the async mailer and the WTForms forms are imported inside
+# the views that use them, so app startup (and CLI commands such as
+# 'flask db upgrade') does not pay for importing them.
+
 # --- Helper Function to Save Uploaded Images ---
+IMAGE_EXTENSIONS = {'JPEG': '.jpg', 'PNG': '.png', 'GIF': '.gif'}
+
 def save_picture(form_picture):
+    from PIL import Image
     random_hex = secrets.token_hex(8)
-    _, f_ext = os.path.splitext(form_picture.filename)
+    output_size = (1200, 1200)
+    i = Image.open(form_picture)
+    # Name the file after its real format (PostForm only accepts these),
+    # not the extension the client sent, so it can always be saved as-is.
+    f_ext = IMAGE_EXTENSIONS[i.format]
     picture_fn = random_hex + f_ext
     picture_path = os.path.join(current_app.config['UPLOAD_FOLDER'], picture_fn)
 
-    output_size = (1200, 1200)
-    i = Image.open(form_picture)
+    # For JPEGs, let the decoder scale down while decoding so the full-size
+    # image is never held in memory. (PostForm has already checked the size.)
+    i.draft(i.mode, output_size)
     i.thumbnail(output_size)
     i.save(picture_path)
     return picture_fn
 
+def delete_post_images(filenames):
+    """Removes uploaded images of deleted posts. URLs and the default image are skipped."""
+    for filename in filenames:
+        if not filename or filename.startswith('http') or filename == 'default_post.jpg':
+            continue
+        path = os.path.join(current_app.config['UPLOAD_FOLDER'], os.path.basename(filename))
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+# --- Helper Functions for the Careers Page Filters ---
+JOB_FACETS_CACHE_KEY = 'job_facets'
+
+def get_job_facets():
+    """Returns the number of jobs per location and per job type, cached."""
+    def compute():
+        return {
+            'locations': db.session.query(Job.location, db.func.count(Job.id))
+                .filter(Job.archived == False).group_by(Job.location).order_by(Job.location).all(),
+            'job_types': db.session.query(Job.job_type, db.func.count(Job.id))
+                .filter(Job.archived == False).group_by(Job.job_type).order_by(Job.job_type).all()
+        }
+    return cache.get_or_set(JOB_FACETS_CACHE_KEY, compute,
+                            timeout=current_app.config['JOB_FACETS_CACHE_TIMEOUT'])
+
+def invalidate_job_facets():
+    """Call after any job is created, updated or deleted."""
+    cache.delete(JOB_FACETS_CACHE_KEY)
+
+# --- Helper Functions for the Home Page Fragments ---
+HOME_INTRO_CACHE_KEY = 'fragment:home_intro'
+RECENT_POSTS_CACHE_KEY = 'fragment:recent_posts'
+
+def invalidate_recent_posts():
+    """Call after any post is created, updated or deleted."""
+    cache.delete(RECENT_POSTS_CACHE_KEY)
+
 # --- Main Page Routes ---
 
 @bp.route('/')
 @bp.route('/home')
 def index():
-    recent_posts = Post.query.order_by(Post.timestamp.desc()).limit(3).all()
-    return render_template('home.html', title='Home', posts=recent_posts)
+    # The hero/services sections never change, so they are cached for the life of the process.
+    home_intro = cached_fragment(HOME_INTRO_CACHE_KEY, 'includes/_home_intro.html')
+    recent_posts = cached_fragment(
+        RECENT_POSTS_CACHE_KEY, 'includes/_recent_posts.html',
+        lambda: {'posts': Post.query.filter_by(archived=False).order_by(Post.timestamp.desc()).limit(3).all()},
+        timeout=current_app.config['RECENT_POSTS_CACHE_TIMEOUT']
+    )
+    return render_template('home.html', title='Home', home_intro=home_intro, recent_posts=recent_posts)
 
 @bp.route('/about')
 def about():
@@ -53,35 +109,48 @@ def for_hire():
 
 @bp.route('/careers')
 def careers():
-    jobs = Job.query.order_by(Job.id).all()
-    return render_template('careers.html', title='Careers', jobs=jobs)
+    location = request.args.get('location', '')
+    job_type = request.args.get('type', '')
+    page = request.args.get('page', 1, type=int)
+
+    # The listing only shows a teaser, so load 'summary' instead of the full description.
+    query = Job.query.options(db.defer(Job.description), db.undefer(Job.summary)).filter_by(archived=False)
+    if location:
+        query = query.filter(Job.location == location)
+    if job_type:
+        query = query.filter(Job.job_type == job_type)
+    jobs = query.order_by(Job.id).paginate(page=page, per_page=current_app.config['JOBS_PER_PAGE'], error_out=False)
+
+    return render_template('careers.html', title='Careers', jobs=jobs, facets=get_job_facets(),
+                           location=location, job_type=job_type)
 
 @bp.route('/contact', methods=['GET', 'POST'])
 @login_required
-def contact():
+async def contact():
+    from app.forms import ContactForm
+    from app.mailer import send_email
     form = ContactForm()
     if form.validate_on_submit():
         try:
-            msg_to_company = Message(
-                subject=f"SPIConsulting New Contact Form Submission from {form.name.data}",
-                sender=current_app.config['MAIL_USERNAME'],
-                recipients=current_app.config['ADMINS']
-            )
-            msg_to_company.body = f"""
+            # Both emails are sent at the same time, so the view waits for
+            # one SMTP round trip instead of two.
+            await asyncio.gather(
+                send_email(
+                    subject=f"SPIConsulting New Contact Form Submission from {form.name.data}",
+                    recipients=current_app.config['ADMINS'],
+                    body=f"""
             Name: {form.name.data}
             Email: {form.email.data}
             Service of Interest: {dict(form.service.choices).get(form.service.data)}
             Message: {form.message.data}
             """
-            mail.send(msg_to_company)
-
-            msg_to_user = Message(
-                subject="Thank you for contacting SkilledProfessionalsIndia Consulting",
-                sender=current_app.config['MAIL_USERNAME'],
-                recipients=[form.email.data]
+                ),
+                send_email(
+                    subject="Thank you for contacting SkilledProfessionalsIndia Consulting",
+                    recipients=[form.email.data],
+                    body="Thank you for your message! We will get back to you shortly."
+                )
             )
-            msg_to_user.body = "Thank you for your message! We will get back to you shortly."
-            mail.send(msg_to_user)
 
             flash('Thank you for your message! A confirmation has been sent to your email.', 'success')
         except Exception as e:
@@ -102,23 +171,35 @@ def privacy():
 
 @bp.route('/blog')
 def blog():
-    posts = Post.query.order_by(Post.timestamp.desc()).all()
+    posts = Post.query.filter_by(archived=False).order_by(Post.timestamp.desc()).all()
     return render_template('blog.html', title='Blog', posts=posts)
 
 @bp.route('/post/<int:post_id>')
 def post(post_id):
     post = Post.query.get_or_404(post_id)
-    return render_template('post.html', title=post.title, post=post)
+    if post.archived and not (current_user.is_authenticated and current_user.is_admin):
+        abort(404)
+    # The related posts were picked when the post was saved (see app/related.py),
+    # so showing them is a single primary-key lookup.
+    related_ids = [post_id for post_id, _ in post.related_posts or []]
+    related_posts = []
+    if related_ids:
+        found = Post.query.options(db.defer(Post.content)) \
+            .filter(Post.id.in_(related_ids), Post.archived == False).all()
+        related_posts = sorted(found, key=lambda p: related_ids.index(p.id))
+    return render_template('post.html', title=post.title, post=post, related_posts=related_posts)
 
 @bp.route('/create_post', methods=['GET', 'POST'])
 @login_required
 @admin_required
-def create_post():
+async def create_post():
+    from app.forms import PostForm
     form = PostForm()
     if form.validate_on_submit():
         image_filename = 'default_post.jpg'
         if form.image_upload.data:
-            image_filename = save_picture(form.image_upload.data)
+            # Resizing and writing the image runs in a thread, off the event loop.
+            image_filename = await asyncio.to_thread(save_picture, form.image_upload.data)
         elif form.image_url.data:
             image_filename = form.image_url.data
         post = Post(
@@ -129,6 +210,8 @@ def create_post():
         )
         db.session.add(post)
         db.session.commit()
+        update_related_posts(post)
+        invalidate_recent_posts()
         flash('Your post has been created!', 'success')
         return redirect(url_for('main.blog'))
     return render_template('create_post.html', title='New Post', form=form, legend='New Post')
@@ -136,19 +219,22 @@ def create_post():
 @bp.route('/post/<int:post_id>/update', methods=['GET', 'POST'])
 @login_required
 @admin_required
-def update_post(post_id):
+async def update_post(post_id):
     post = Post.query.get_or_404(post_id)
     if not current_user.is_admin:
         abort(403)
+    from app.forms import PostForm
     form = PostForm()
     if form.validate_on_submit():
         if form.image_upload.data:
-            post.image_file = save_picture(form.image_upload.data)
+            post.image_file = await asyncio.to_thread(save_picture, form.image_upload.data)
         elif form.image_url.data:
             post.image_file = form.image_url.data
         post.title = form.title.data
         post.content = form.content.data
         db.session.commit()
+        update_related_posts(post)
+        invalidate_recent_posts()
         flash('Your post has been updated!', 'success')
         return redirect(url_for('main.post', post_id=post.id))
     elif request.method == 'GET':
@@ -165,8 +251,12 @@ def delete_post(post_id):
     post = Post.query.get_or_404(post_id)
     if not current_user.is_admin:
         abort(403)
+    image_file = post.image_file
+    remove_related_posts([post.id])
     db.session.delete(post)
     db.session.commit()
+    invalidate_recent_posts()
+    delete_post_images([image_file])
     flash('Your post has been deleted.', 'success')
     return redirect(url_for('main.blog'))
 
@@ -175,17 +265,21 @@ def delete_post(post_id):
 @bp.route('/career/<int:job_id>')
 def job_opening(job_id):
     job = Job.query.get_or_404(job_id)
+    if job.archived and not (current_user.is_authenticated and current_user.is_admin):
+        abort(404)
     return render_template('job_opening.html', title=job.title, job=job)
 
 @bp.route('/create_job', methods=['GET', 'POST'])
 @login_required
 @admin_required
 def create_job():
+    from app.forms import JobForm
     form = JobForm()
     if form.validate_on_submit():
         job = Job(title=form.title.data, location=form.location.data, job_type=form.job_type.data, description=form.description.data)
         db.session.add(job)
         db.session.commit()
+        invalidate_job_facets()
         flash('The job posting has been created.', 'success')
         return redirect(url_for('main.careers'))
     return render_template('create_job.html', title='Create Job Posting', form=form)
@@ -195,6 +289,7 @@ def create_job():
 @admin_required
 def update_job(job_id):
     job = Job.query.get_or_404(job_id)
+    from app.forms import JobForm
     form = JobForm()
     if form.validate_on_submit():
         job.title = form.title.data
@@ -202,6 +297,7 @@ def update_job(job_id):
         job.job_type = form.job_type.data
         job.description = form.description.data
         db.session.commit()
+        invalidate_job_facets()
         flash('The job posting has been updated.', 'success')
         return redirect(url_for('main.job_opening', job_id=job.id))
     elif request.method == 'GET':
@@ -218,9 +314,85 @@ def delete_job(job_id):
     job = Job.query.get_or_404(job_id)
     db.session.delete(job)
     db.session.commit()
+    invalidate_job_facets()
     flash('The job posting has been deleted.', 'success')
     return redirect(url_for('main.careers'))
 
+# --- Admin Dashboard and Bulk Actions ---
+# Each bulk action is a single UPDATE or DELETE ... WHERE id IN (...), and
+# the caches are cleared once per action rather than once per row.
+
+def author_choices():
+    return [(u.id, u.username) for u in db.session.query(User.id, User.username).order_by(User.username)]
+
+@bp.route('/admin')
+@login_required
+@admin_required
+def admin_dashboard():
+    from app.forms import BulkPostActionForm, BulkJobActionForm
+    post_form = BulkPostActionForm(prefix='posts')
+    post_form.author.choices = author_choices()
+    job_form = BulkJobActionForm(prefix='jobs')
+    posts = Post.query.options(db.defer(Post.content), db.joinedload(Post.author)).order_by(Post.timestamp.desc()).all()
+    jobs = Job.query.options(db.defer(Job.description)).order_by(Job.id).all()
+    return render_template('admin.html', title='Admin Dashboard', posts=posts, jobs=jobs,
+                           post_form=post_form, job_form=job_form)
+
+@bp.route('/admin/posts/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_posts():
+    from app.forms import BulkPostActionForm
+    form = BulkPostActionForm(prefix='posts')
+    form.author.choices = author_choices()
+    post_ids = request.form.getlist('post_ids', type=int)
+    if not form.validate_on_submit() or not post_ids:
+        flash('Please select at least one post and an action.', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
+
+    selected = Post.id.in_(post_ids)
+    action = form.action.data
+    image_files = []
+    if action == 'delete':
+        image_files = db.session.execute(db.select(Post.image_file).where(selected)).scalars().all()
+        remove_related_posts(post_ids)
+        statement = db.delete(Post).where(selected)
+    elif action == 'reassign':
+        statement = db.update(Post).where(selected).values(user_id=form.author.data)
+    else:
+        statement = db.update(Post).where(selected).values(archived=(action == 'archive'))
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    invalidate_recent_posts()
+    delete_post_images(image_files)
+
+    flash(f'{result.rowcount} post(s) updated: {dict(form.action.choices)[action]}.', 'success')
+    return redirect(url_for('main.admin_dashboard'))
+
+@bp.route('/admin/jobs/bulk', methods=['POST'])
+@login_required
+@admin_required
+def bulk_jobs():
+    from app.forms import BulkJobActionForm
+    form = BulkJobActionForm(prefix='jobs')
+    job_ids = request.form.getlist('job_ids', type=int)
+    if not form.validate_on_submit() or not job_ids:
+        flash('Please select at least one job and an action.', 'danger')
+        return redirect(url_for('main.admin_dashboard'))
+
+    selected = Job.id.in_(job_ids)
+    action = form.action.data
+    if action == 'delete':
+        statement = db.delete(Job).where(selected)
+    else:
+        statement = db.update(Job).where(selected).values(archived=(action == 'archive'))
+    result = db.session.execute(statement.execution_options(synchronize_session=False))
+    db.session.commit()
+    invalidate_job_facets()
+
+    flash(f'{result.rowcount} job(s) updated: {dict(form.action.choices)[action]}.', 'success')
+    return redirect(url_for('main.admin_dashboard'))
+
 # --- Admin Data Export Route ---
 
 @bp.route('/export/download')
@@ -231,9 +403,9 @@ def download_export():
         users = User.query.all()
         users_data = [{'id': u.id, 'username': u.username, 'email': u.email, 'is_admin': u.is_admin} for u in users]
         posts = Post.query.all()
-        posts_data = [{'id': p.id, 'title': p.title, 'content': p.content, 'timestamp': p.timestamp.isoformat(), 'author_username': p.author.username} for p in posts]
+        posts_data = [{'id': p.id, 'title': p.title, 'content': p.content, 'timestamp': p.timestamp.isoformat(), 'author_username': p.author.username, 'archived': p.archived} for p in posts]
         jobs = Job.query.all()
-        jobs_data = [{'id': j.id, 'title': j.title, 'location': j.location, 'job_type': j.job_type, 'description': j.description} for j in jobs]
+        jobs_data = [{'id': j.id, 'title': j.title, 'location': j.location, 'job_type': j.job_type, 'description': j.description, 'archived': j.archived} for j in jobs]
         full_export = {'users': users_data, 'posts': posts_data, 'jobs': jobs_data}
         response = jsonify(full_export)
         response.headers['Content-Disposition'] = 'attachment; filename=full_database_export.json'
@@ -246,6 +418,15 @@ def download_export():
     
     
 
+# --- Admin Cache Statistics Route ---
+
+@bp.route('/cache/stats')
+@login_required
+@admin_required
+def cache_stats():
+    """Shows hit/miss counts for this worker's cache, to help tune timeouts."""
+    return jsonify(cache.stats())
+
 # --- UPDATED ROUTE TO GENERATE SITEMAP.XML ---
 @bp.route('/sitemap.xml')
 def sitemap():
@@ -254,10 +435,10 @@ def sitemap():
     lastmod_date = datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S+00:00')
 
     # Get all published blog posts
-    posts = Post.query.order_by(Post.timestamp.desc()).all()
+    posts = Post.query.filter_by(archived=False).order_by(Post.timestamp.desc()).all()
     
     # Get all active job openings
-    jobs = Job.query.order_by(Job.id).all()
+    jobs = Job.query.filter_by(archived=False).order_by(Job.id).all()
 
     # List of static pages to include
     static_pages = [
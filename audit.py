@@ -0,0 +1,251 @@
+import json
+import random
+import re
+from datetime import datetime, timedelta
+import click
+from flask.cli import with_appcontext
+from app import db
+from app.models import User, Post, Job, Term, PostTerm
+from app.related import similarity_statement
+
+
+def _query_patterns():
+    """
+    Every query the app runs, as (description, where it is used, statement,
+    (table, column) pairs it filters or sorts on, problems expected by
+    design: 'scan' if it reads every row, 'sort' if it has to sort or group
+    rows no index can order). Keep this in step with the queries in the app.
+    """
+    SCAN, SORT = ('scan',), ('sort',)
+    count = db.func.count
+    return [
+        ('Recent posts', 'routes.index',
+         db.select(Post).where(Post.archived == False).order_by(Post.timestamp.desc()).limit(3),
+         [('post', 'timestamp')], ()),
+        ('Careers listing, filtered', 'routes.careers',
+         db.select(Job.id, Job.title, Job.location, Job.job_type, Job.summary)
+           .where(Job.archived == False, Job.location == 'Pune', Job.job_type == 'Full-time')
+           .order_by(Job.id).limit(9).offset(0),
+         [('job', 'location'), ('job', 'job_type')], ()),
+        ('Careers listing, count for pagination', 'routes.careers',
+         db.select(count()).select_from(Job)
+           .where(Job.archived == False, Job.location == 'Pune', Job.job_type == 'Full-time'),
+         [('job', 'location'), ('job', 'job_type')], ()),
+        ('Jobs per location', 'routes.get_job_facets',
+         db.select(Job.location, count(Job.id)).where(Job.archived == False)
+           .group_by(Job.location).order_by(Job.location),
+         [('job', 'location')], ()),
+        ('Jobs per job type', 'routes.get_job_facets',
+         db.select(Job.job_type, count(Job.id)).where(Job.archived == False)
+           .group_by(Job.job_type).order_by(Job.job_type),
+         [('job', 'job_type')], ()),
+        ('Blog listing', 'routes.blog',
+         db.select(Post).where(Post.archived == False).order_by(Post.timestamp.desc()),
+         [('post', 'timestamp')], SCAN),
+        ('Single post', 'routes.post',
+         db.select(Post).where(Post.id == 1), [], ()),
+        ('Related articles', 'routes.post',
+         db.select(Post).where(Post.id.in_([1, 2, 3]), Post.archived == False), [], ()),
+        ('Single job', 'routes.job_opening',
+         db.select(Job).where(Job.id == 1), [], ()),
+        ('Sitemap jobs', 'routes.sitemap',
+         db.select(Job).where(Job.archived == False).order_by(Job.id), [], SCAN),
+        ('Login by email', 'auth.login',
+         db.select(User).where(User.email == 'someone@example.com').limit(1),
+         [('user', 'email')], ()),
+        ('Logged-in user', 'app.load_user',
+         db.select(User).where(User.id == 1), [], ()),
+        ('Username taken?', 'forms.RegistrationForm.validate_username',
+         db.select(User).where(User.username == 'someone').limit(1),
+         [('user', 'username')], ()),
+        ('Email registered?', 'forms.RegistrationForm.validate_email',
+         db.select(User).where(User.email == 'someone@example.com').limit(1),
+         [('user', 'email')], ()),
+        ('Post author', 'Post.author (blog, exporter)',
+         db.select(User).where(User.id == 1), [], ()),
+        ("A user's posts", 'User.posts (also loaded when a user is deleted)',
+         db.select(Post).where(Post.user_id == 1),
+         [('post', 'user_id')], ()),
+        ('Admin post listing', 'routes.admin_dashboard',
+         db.select(Post.id, Post.title, Post.timestamp, Post.archived, User.username)
+           .outerjoin(User, Post.author).order_by(Post.timestamp.desc()),
+         [('post', 'timestamp')], SCAN),
+        ('Admin job listing', 'routes.admin_dashboard',
+         db.select(Job.id, Job.title, Job.location, Job.job_type, Job.archived).order_by(Job.id), [], SCAN),
+        ('Author choices', 'routes.author_choices',
+         db.select(User.id, User.username).order_by(User.username), [('user', 'username')], SCAN),
+        ('Images of selected posts', 'routes.bulk_posts',
+         db.select(Post.image_file).where(Post.id.in_([1, 2, 3])), [], ()),
+        ('Posts similar to one post', 'related.update_related_posts, related.remove_related_posts',
+         similarity_statement([1]), [], SORT),
+        ('Most similar posts for a batch', 'related.compute_all_related_posts',
+         similarity_statement(list(range(1, 501)), limit=3), [], SORT),
+        ('Document frequencies of a post\'s words', 'related.update_related_posts',
+         db.select(Term.term, Term.document_frequency).where(Term.term.in_(['python', 'flask'])), [], ()),
+        ('Post count for IDF', 'related.update_related_posts',
+         db.select(count(Post.id)), [], SCAN),
+        ('Related lists to update', 'related.update_related_posts, related.remove_related_posts',
+         db.select(Post.id, Post.related_posts).where(Post.id.in_([1, 2, 3])), [], ()),
+        ('Next batch of posts', 'related.compute_all_related_posts',
+         db.select(Post.id, Post.title, Post.content).where(Post.id > 500).order_by(Post.id).limit(500),
+         [], ()),
+        ('Export users', 'exporter.export_all_data_command',
+         db.select(User), [], SCAN),
+        ('Export posts', 'exporter.export_all_data_command',
+         db.select(Post), [], SCAN),
+        ('Export jobs', 'exporter.export_all_data_command',
+         db.select(Job), [], SCAN),
+    ]
+
+
+def _seed(users, posts, jobs):
+    """Adds a realistic amount of fake data. The caller rolls it back."""
+    start_id = (db.session.query(db.func.max(User.id)).scalar() or 0) + 1
+    user_ids = list(range(start_id, start_id + users))
+    db.session.execute(User.__table__.insert(), [
+        {'id': i, 'username': f'audit-{i}', 'email': f'audit-{i}@example.com', 'is_admin': False}
+        for i in user_ids
+    ])
+    now = datetime.utcnow()
+    db.session.execute(Post.__table__.insert(), [
+        {'title': f'Audit post {i}', 'content': 'Lorem ipsum dolor sit amet. ' * 50,
+         'timestamp': now - timedelta(hours=i), 'user_id': random.choice(user_ids),
+         'slug': f'audit-post-{i}', 'image_file': 'default_post.jpg'}
+        for i in range(posts)
+    ])
+    locations = ['Pune', 'Bengaluru', 'Hyderabad', 'Chennai', 'Remote']
+    job_types = ['Full-time', 'Part-time', 'Contract']
+    db.session.execute(Job.__table__.insert(), [
+        {'title': f'Audit job {i}', 'location': random.choice(locations),
+         'job_type': random.choice(job_types), 'description': 'Responsibilities. ' * 100}
+        for i in range(jobs)
+    ])
+    words = [f'word{i}' for i in range(5000)]
+    db.session.execute(Term.__table__.insert(), [{'term': w, 'document_frequency': random.randint(2, 50)} for w in words])
+    post_ids = db.session.execute(db.select(Post.id).where(Post.slug.like('audit-post-%'))).scalars().all()
+    db.session.execute(PostTerm.__table__.insert(), [
+        {'post_id': post_id, 'term': term, 'weight': random.random()}
+        for post_id in post_ids for term in random.sample(words, 25)
+    ])
+    if db.engine.dialect.name == 'postgresql':
+        # Give the planner statistics for the seeded data.
+        db.session.execute(db.text('ANALYZE "user", post, job, term, post_term'))
+
+
+def _sqlite_problems(sql):
+    """Runs EXPLAIN QUERY PLAN and returns (problems, plan lines)."""
+    rows = db.session.execute(db.text('EXPLAIN QUERY PLAN ' + sql)).all()
+    details = [row[-1] for row in rows]
+    problems = []
+    for detail in details:
+        scan = re.match(r'SCAN (?:TABLE )?(\w+)$', detail)
+        # Scans of subqueries are fine; only scans of real tables are flagged.
+        if scan and scan.group(1) in db.metadata.tables:
+            problems.append(('scan', scan.group(1)))
+        elif detail.startswith('USE TEMP B-TREE'):
+            problems.append(('sort', detail[len('USE TEMP B-TREE FOR '):]))
+    return problems, details
+
+
+def _postgres_problems(sql):
+    """Runs EXPLAIN ANALYZE and returns (problems, plan lines)."""
+    plan = db.session.execute(db.text('EXPLAIN (ANALYZE, FORMAT JSON) ' + sql)).scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    problems = []
+    details = [f"Execution time: {plan[0]['Execution Time']:.2f} ms"]
+
+    def walk(node, depth):
+        details.append('  ' * depth + node['Node Type'] + (f" on {node['Relation Name']}" if 'Relation Name' in node else ''))
+        if node['Node Type'] == 'Seq Scan':
+            problems.append(('scan', node['Relation Name']))
+        elif node['Node Type'] in ('Sort', 'Incremental Sort'):
+            problems.append(('sort', ', '.join(node.get('Sort Key', []))))
+        for child in node.get('Plans', []):
+            walk(child, depth + 1)
+
+    walk(plan[0]['Plan'], 0)
+    return problems, details
+
+
+def _indexed_columns():
+    """(table, column) pairs that lead an index, primary key or unique constraint in the models."""
+    indexed = set()
+    for table in db.metadata.tables.values():
+        for index in table.indexes:
+            indexed.add((table.name, index.columns[0].name))
+        for constraint in table.constraints:
+            columns = list(constraint.columns)
+            if columns and isinstance(constraint, (db.PrimaryKeyConstraint, db.UniqueConstraint)):
+                indexed.add((table.name, columns[0].name))
+    return indexed
+
+
+def _migration_proposal(missing):
+    """Alembic upgrade/downgrade functions creating the missing indexes."""
+    by_table = {}
+    for table, column in sorted(missing):
+        by_table.setdefault(table, []).append(column)
+    upgrade, downgrade = [], []
+    for table, columns in by_table.items():
+        upgrade.append(f"    with op.batch_alter_table('{table}', schema=None) as batch_op:")
+        downgrade.append(f"    with op.batch_alter_table('{table}', schema=None) as batch_op:")
+        for column in columns:
+            upgrade.append(f"        batch_op.create_index(batch_op.f('ix_{table}_{column}'), ['{column}'], unique=False)")
+            downgrade.append(f"        batch_op.drop_index(batch_op.f('ix_{table}_{column}'))")
+        upgrade.append('')
+        downgrade.append('')
+    return '\n'.join(['def upgrade():'] + upgrade + ['', 'def downgrade():'] + downgrade)
+
+
+# This decorator registers a new command 'db-audit' with Flask
+@click.command('db-audit')
+@click.option('--users', default=200, show_default=True, help='Fake users to seed.')
+@click.option('--posts', default=20000, show_default=True, help='Fake posts to seed.')
+@click.option('--jobs', default=2000, show_default=True, help='Fake jobs to seed.')
+@click.option('--verbose', is_flag=True, help='Print every query plan.')
+@with_appcontext
+def db_audit_command(users, posts, jobs, verbose):
+    """Explains every app query against seeded data and proposes missing indexes."""
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        explain = _postgres_problems
+    elif dialect == 'sqlite':
+        explain = _sqlite_problems
+    else:
+        raise click.ClickException(f'db-audit does not support {dialect} databases.')
+
+    indexed = _indexed_columns()
+    missing = set()
+    flagged = 0
+    patterns = _query_patterns()
+    try:
+        _seed(users, posts, jobs)
+        for name, source, stmt, columns, expected in patterns:
+            sql = str(stmt.compile(dialect=db.engine.dialect, compile_kwargs={'literal_binds': True}))
+            problems, details = explain(sql)
+            problems = [p for p in problems if p[0] not in expected]
+
+            click.echo(f"{'FLAG' if problems else 'ok  '}  {name} ({source})")
+            for kind, what in problems:
+                click.echo(f'        full table scan of {what}' if kind == 'scan' else f'        sort: {what}')
+            if verbose or problems:
+                for line in details:
+                    click.echo(f'        | {line}')
+            if problems:
+                flagged += 1
+                for table, column in columns:
+                    if (table, column) in indexed:
+                        click.echo(f'        note: {table}.{column} is indexed in the models. Is the database migrated?')
+                    else:
+                        missing.add((table, column))
+    finally:
+        # Never keep the seeded rows.
+        db.session.rollback()
+
+    click.echo(f'\n{flagged} of {len(patterns)} queries flagged.')
+    if missing:
+        click.echo('\nMissing indexes: ' + ', '.join(f'{t}.{c}' for t, c in sorted(missing)))
+        click.echo("Add index=True to these columns in app/models.py, then run 'flask db migrate'.")
+        click.echo('It should generate a migration like this:\n')
+        click.echo(_migration_proposal(missing))
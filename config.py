@@ -22,11 +22,59 @@ class Config:
     # Folder for uploaded post images
     UPLOAD_FOLDER = os.path.join(basedir, 'app/static/post_images')
 
+    # --- UPLOAD SETTINGS ---
+    # Requests with a larger body are rejected with 413 before they are read.
+    # (Werkzeug already spools file uploads over 500 KB to a temporary file
+    # on disk rather than holding them in memory.)
+    MAX_CONTENT_LENGTH = 8 * 1024 * 1024
+    # Largest image (width x height) accepted for a post. This is checked from
+    # the image header, before any pixel data is decoded.
+    MAX_IMAGE_PIXELS = 40_000_000
+
+    # --- CAREERS PAGE SETTINGS ---
+    JOBS_PER_PAGE = 9
+    # Seconds the jobs-per-location/type counts are cached for. Each worker
+    # clears its own copy on job writes; this bounds staleness in the others.
+    JOB_FACETS_CACHE_TIMEOUT = 300
+
+    # --- HOME PAGE SETTINGS ---
+    # Seconds the "From Our Blog" fragment is cached for. As above, post
+    # writes clear it straight away in the worker that handled them.
+    RECENT_POSTS_CACHE_TIMEOUT = 300
+
+    # --- RELATED POSTS SETTINGS ---
+    RELATED_POSTS_COUNT = 3
+    # Most distinctive words stored per post for the similarity (see app/related.py).
+    RELATED_POSTS_TERMS_PER_POST = 25
+    READING_WORDS_PER_MINUTE = 200
+
     # --- MAIL SERVER SETTINGS ---
     MAIL_SERVER = os.environ.get('MAIL_SERVER')
     MAIL_PORT = int(os.environ.get('MAIL_PORT') or 587)
     MAIL_USE_TLS = os.environ.get('MAIL_USE_TLS') is not None
     MAIL_USERNAME = os.environ.get('MAIL_USERNAME')
     MAIL_PASSWORD = os.environ.get('MAIL_PASSWORD')
+    # Seconds to wait for the SMTP server before giving up (async mailer only).
+    MAIL_TIMEOUT = int(os.environ.get('MAIL_TIMEOUT') or 10)
     ADMINS = ['getintouch.spiconsulting@gmail.com'] # The email that will receive messages
 
+    # --- RATE LIMITING SETTINGS ---
+    RATELIMIT_ENABLED = True
+    # 'memory' only works with a single worker. Use 'sqlite' when running
+    # several gunicorn workers so they share one set of counters.
+    RATELIMIT_STORAGE = os.environ.get('RATELIMIT_STORAGE') or 'memory'
+    RATELIMIT_SQLITE_PATH = os.environ.get('RATELIMIT_SQLITE_PATH') or \
+        os.path.join(basedir, 'ratelimit.db')
+    # Endpoint -> (max POST requests, window in seconds), per client IP.
+    RATELIMITS = {
+        'main.contact': (5, 3600),
+        'auth.register': (3, 3600),
+    }
+    # Limits are counted per client IP, taken from request.remote_addr. Behind
+    # a reverse proxy or load balancer (e.g. an AWS ALB) that is the proxy's
+    # address, so every visitor would share one counter. Set this to the
+    # number of proxies in front of the app to read the client IP from
+    # X-Forwarded-For instead. Leave it at 0 when clients connect directly,
+    # or they could fake the header to dodge the limits.
+    TRUSTED_PROXY_COUNT = int(os.environ.get('TRUSTED_PROXY_COUNT') or 0)
+
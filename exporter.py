@@ -1,4 +1,7 @@
 import json
+import re
+import time
+from datetime import datetime
 import click
 from flask.cli import with_appcontext
 from app import db
@@ -10,7 +13,9 @@ from app.models import User, Post, Job
 def export_all_data_command():
     """Exports all major data from the database to a single JSON file."""
     
-    # --- Export Users (excluding sensitive password hash) ---
+    # --- Export Users ---
+    # Password hashes are included so users can still log in after the data
+    # is imported into another database. Keep this file private.
     users = User.query.all()
     users_data = []
     for user in users:
@@ -18,7 +23,8 @@ def export_all_data_command():
             'id': user.id,
             'username': user.username,
             'email': user.email,
-            'is_admin': user.is_admin
+            'is_admin': user.is_admin,
+            'password_hash': user.password_hash
         })
         
     # --- Export Posts ---
@@ -32,7 +38,8 @@ def export_all_data_command():
             'timestamp': post.timestamp.isoformat(),
             'author_username': post.author.username,
             'slug': post.slug,
-            'image_file': post.image_file
+            'image_file': post.image_file,
+            'archived': post.archived
         })
 
     # --- Export Jobs ---
@@ -44,7 +51,8 @@ def export_all_data_command():
             'title': job.title,
             'location': job.location,
             'job_type': job.job_type,
-            'description': job.description
+            'description': job.description,
+            'archived': job.archived
         })
         
     # --- Combine all data into a single dictionary ---
@@ -60,3 +68,103 @@ def export_all_data_command():
         
     click.echo('Successfully exported all data to full_database_export.json')
 
+
+# --- Import (the inverse of export-all-data) ---
+
+def _slugify(title, post_id):
+    """Fallback slug for exports made before slugs were included."""
+    slug = re.sub(r'[^a-z0-9]+', '-', title.lower()).strip('-')
+    return f'{slug}-{post_id}'
+
+
+def _insert_in_batches(table, rows, batch_size):
+    """
+    Inserts rows into a table with one executemany() per batch and returns
+    (row_count, seconds). SQLAlchemy turns this into multi-row INSERTs on
+    PostgreSQL and a single prepared statement on SQLite.
+    """
+    count = 0
+    start = time.perf_counter()
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            db.session.execute(table.insert(), batch)
+            count += len(batch)
+            batch = []
+    if batch:
+        db.session.execute(table.insert(), batch)
+        count += len(batch)
+    return count, time.perf_counter() - start
+
+
+def _reset_sequences(tables):
+    """Moves PostgreSQL id sequences past the imported (preserved) ids."""
+    if db.engine.dialect.name != 'postgresql':
+        return
+    for table in tables:
+        db.session.execute(db.text(
+            f"SELECT setval(pg_get_serial_sequence('\"{table.name}\"', 'id'), "
+            f"COALESCE((SELECT MAX(id) FROM \"{table.name}\"), 0) + 1, false)"
+        ))
+
+
+# This decorator registers a new command 'import-all-data' with Flask
+@click.command('import-all-data')
+@click.argument('path', default='full_database_export.json')
+@click.option('--batch-size', default=500, show_default=True, help='Rows per INSERT batch.')
+@with_appcontext
+def import_all_data_command(path, batch_size):
+    """Restores a full_database_export.json file into an empty database."""
+    if User.query.first() or Post.query.first() or Job.query.first():
+        raise click.ClickException('The database already contains data. Import into an empty database.')
+
+    with open(path) as f:
+        data = json.load(f)
+
+    users = data.get('users', [])
+    user_ids = {u['username']: u['id'] for u in users}
+
+    # Exports made before password hashes were included leave them empty.
+    # Those users cannot log in until 'flask set-password' is run for them.
+    user_rows = ({
+        'id': u['id'],
+        'username': u['username'],
+        'email': u['email'],
+        'is_admin': u['is_admin'],
+        'password_hash': u.get('password_hash')
+    } for u in users)
+
+    post_rows = ({
+        'id': p['id'],
+        'title': p['title'],
+        'content': p['content'],
+        'timestamp': datetime.fromisoformat(p['timestamp']),
+        'user_id': user_ids.get(p['author_username']),
+        'slug': p.get('slug') or _slugify(p['title'], p['id']),
+        'image_file': p.get('image_file') or 'default_post.jpg',
+        'archived': p.get('archived', False)
+    } for p in data.get('posts', []))
+
+    job_rows = ({
+        'id': j['id'],
+        'title': j['title'],
+        'location': j['location'],
+        'job_type': j['job_type'],
+        'description': j['description'],
+        'archived': j.get('archived', False)
+    } for j in data.get('jobs', []))
+
+    tables = [User.__table__, Post.__table__, Job.__table__]
+    try:
+        for table, rows in zip(tables, [user_rows, post_rows, job_rows]):
+            count, seconds = _insert_in_batches(table, rows, batch_size)
+            rate = count / seconds if seconds else 0
+            click.echo(f'Imported {count} {table.name} rows in {seconds:.2f}s ({rate:,.0f} rows/sec)')
+        _reset_sequences(tables)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    click.echo(f'Successfully imported all data from {path}')
@@ -0,0 +1,10 @@
+# Gunicorn settings. Gunicorn loads this file automatically when it is
+# started from this directory (e.g. 'gunicorn run:app').
+import os
+
+# Threaded workers: a request waiting on SMTP or disk ties up one thread
+# instead of a whole worker process. The async views (main.contact, post
+# create/update) run inside these threads. Set the number of worker
+# processes with WEB_CONCURRENCY as usual.
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS') or 8)
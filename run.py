@@ -1,19 +1,29 @@
+import os
+
+# Load environment variables from the .env file. This is crucial for security.
+# It has to happen before the app (and therefore config.py) is imported, and
+# python-dotenv is only imported when there actually is a .env file to load.
+dotenv_path = os.path.join(os.path.abspath(os.path.dirname(__file__)), '.env')
+if os.path.exists(dotenv_path):
+    from dotenv import load_dotenv
+    load_dotenv(dotenv_path)
+
 # Import the application factory function from our 'app' package.
 from app import create_app, db
-# Import the User and Post models so Flask-Migrate can see them.
-from app.models import User, Post
-# --- UPDATED: Import the new exporter command ---
-from exporter import export_all_data_command
-# Load environment variables from the .env file. This is crucial for security.
-from dotenv import load_dotenv
-load_dotenv()
+# Import the User, Post and Job models so Flask-Migrate can see them.
+from app.models import User, Post, Job
+# The CLI commands below are only imported when they are actually run.
+from app.cli import LazyCommand
 
 # Create the Flask application instance using our factory.
 app = create_app()
 
-# --- UPDATED: Register the new command with the app ---
-# You can remove the old app.cli.add_command if you want
-app.cli.add_command(export_all_data_command)
+# --- Register the CLI commands with the app ---
+app.cli.add_command(LazyCommand('export-all-data', 'exporter:export_all_data_command'))
+app.cli.add_command(LazyCommand('import-all-data', 'exporter:import_all_data_command'))
+app.cli.add_command(LazyCommand('set-password', 'accounts:set_password_command'))
+app.cli.add_command(LazyCommand('compute-related-posts', 'app.related:compute_related_posts_command'))
+app.cli.add_command(LazyCommand('db-audit', 'audit:db_audit_command'))
 
 # This context processor makes the 'db', 'User', and 'Post' variables
 # available in the 'flask shell' for easy testing and debugging.
@@ -26,4 +36,4 @@ def make_shell_context():
 if __name__ == '__main__':
     # Run the application with debugging enabled.
     # Debug mode provides helpful error messages and automatically reloads the server on code changes.
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True)
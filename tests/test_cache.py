@@ -0,0 +1,42 @@
+import time
+from app import db
+from app.cache import Cache, cache
+from app.models import Post, User
+from app.routes import RECENT_POSTS_CACHE_KEY
+
+
+def test_home_page_renders_and_caches_recent_posts(app, client):
+    author = User(username='author', email='author@example.com')
+    post = Post(title='Hello world', content='Some content', slug='hello-world', author=author)
+    db.session.add(post)
+    db.session.commit()
+    cache.clear()
+    hits = cache.stats().get(RECENT_POSTS_CACHE_KEY, {}).get('hits', 0)
+
+    for _ in range(2):
+        response = client.get('/')
+        assert response.status_code == 200
+        assert f'/post/{post.id}'.encode() in response.data
+    stats = cache.stats()[RECENT_POSTS_CACHE_KEY]
+    assert stats['hits'] == hits + 1
+    assert stats['cached']
+
+
+def test_blog_links_to_posts(app, client):
+    author = User(username='author', email='author@example.com')
+    post = Post(title='Hello world', content='Some content', slug='hello-world', author=author)
+    db.session.add(post)
+    db.session.commit()
+    response = client.get('/blog')
+    assert response.status_code == 200
+    assert f'/post/{post.id}'.encode() in response.data
+
+
+def test_stats_do_not_report_expired_entries_as_cached(monkeypatch):
+    local_cache = Cache()
+    local_cache.set('key', 'value', timeout=10)
+    local_cache.get('key')
+    assert local_cache.stats()['key']['cached']
+    later = time.monotonic() + 11
+    monkeypatch.setattr(time, 'monotonic', lambda: later)
+    assert not local_cache.stats()['key']['cached']
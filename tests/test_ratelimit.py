@@ -0,0 +1,38 @@
+import pytest
+from app import create_app
+
+
+def register(client, ip):
+    return client.post('/auth/register', data={}, headers={'X-Forwarded-For': ip})
+
+
+@pytest.mark.parametrize('proxies, second_client_status', [(0, 429), (1, 200)])
+def test_limits_are_per_client_behind_a_trusted_proxy(config, proxies, second_client_status):
+    class ProxyConfig(config):
+        TRUSTED_PROXY_COUNT = proxies
+        RATELIMITS = {'auth.register': (2, 3600)}
+
+    client = create_app(ProxyConfig).test_client()
+    assert [register(client, '203.0.113.1').status_code for _ in range(3)] == [200, 200, 429]
+    # Without a trusted proxy, every client shares the proxy's address.
+    assert register(client, '203.0.113.2').status_code == second_client_status
+
+
+def test_rejected_request_has_retry_after(client):
+    for _ in range(3):
+        register(client, '203.0.113.1')
+    response = register(client, '203.0.113.1')
+    assert response.status_code == 429
+    assert int(response.headers['Retry-After']) > 0
+
+
+def test_each_app_has_its_own_counters(config):
+    class LimitConfig(config):
+        RATELIMITS = {'auth.register': (1, 3600)}
+
+    first = create_app(LimitConfig).test_client()
+    assert register(first, '203.0.113.1').status_code == 200
+    # Creating another app must neither reset nor share the first one's counters.
+    second = create_app(LimitConfig).test_client()
+    assert register(first, '203.0.113.1').status_code == 429
+    assert register(second, '203.0.113.1').status_code == 200
@@ -0,0 +1,86 @@
+from app import db
+from app.models import Post, PostTerm, Term, User
+from app.related import compute_all_related_posts, remove_related_posts, update_related_posts
+
+TEXTS = {
+    'python': 'Python decorators generators and asyncio for backend services.',
+    'django': 'Django views and Python templates for backend services.',
+    'flask': 'Flask blueprints, Python decorators and Jinja templates.',
+    'cloud': 'Migrating databases to AWS RDS with zero downtime.',
+    'aws': 'AWS Lambda, RDS backups and cloud cost reports.',
+}
+
+
+def add_posts():
+    author = User(username='author', email='author@example.com')
+    db.session.add(author)
+    posts = {slug: Post(title=slug.title(), content=text, slug=slug, author=author) for slug, text in TEXTS.items()}
+    db.session.add_all(posts.values())
+    db.session.commit()
+    return posts
+
+
+def related_ids(post):
+    return [post_id for post_id, _ in post.related_posts]
+
+
+def test_compute_all_finds_similar_posts(app):
+    posts = add_posts()
+    assert compute_all_related_posts(batch_size=2) == len(TEXTS)
+    assert set(related_ids(posts['python'])[:2]) == {posts['flask'].id, posts['django'].id}
+    assert related_ids(posts['cloud']) == [posts['aws'].id]
+    assert all(post.reading_time == 1 for post in posts.values())
+    # Only words used by more than one post are kept in the vocabulary.
+    assert db.session.get(Term, 'python').document_frequency == 3
+    assert db.session.get(Term, 'lambda') is None
+
+
+def test_editing_a_post_updates_other_posts_lists(app):
+    posts = add_posts()
+    compute_all_related_posts()
+    cloud = posts['cloud']
+    cloud.title = 'Django tips'
+    cloud.content = 'Python decorators and Django templates.'
+    db.session.commit()
+    update_related_posts(cloud)
+    assert posts['aws'].id not in related_ids(cloud)
+    assert cloud.id in related_ids(posts['django'])
+    assert cloud.id not in related_ids(posts['aws'])
+    assert {term for (term,) in db.session.query(PostTerm.term).filter_by(post_id=cloud.id)} >= {'python', 'decorators'}
+
+
+def test_removed_posts_leave_the_index_and_other_lists(app):
+    posts = add_posts()
+    compute_all_related_posts()
+    aws = posts['aws']
+    remove_related_posts([aws.id])
+    db.session.delete(aws)
+    db.session.commit()
+    assert related_ids(posts['cloud']) == []
+    assert PostTerm.query.filter_by(post_id=aws.id).count() == 0
+
+
+def test_posts_with_many_unique_words_still_match(app):
+    # Words used by one post only get the highest weights, but can never
+    # match another post, so they must not crowd out the shared ones.
+    author = User(username='author', email='author@example.com')
+    unique_words = (f'oneoff{n}' for n in range(1000))
+
+    def text(shared=''):
+        return shared + ' ' + ' '.join(next(unique_words) for _ in range(30))
+
+    posts = [Post(title=f'Post {i}', content=text(), slug=f'post-{i}', author=author) for i in range(8)]
+    first = Post(title='Ops', content=text('kubernetes helm deployment clusters'), slug='first', author=author)
+    second = Post(title='Infra', content=text('kubernetes helm deployment clusters'), slug='second', author=author)
+    db.session.add_all(posts + [first, second])
+    db.session.commit()
+
+    compute_all_related_posts()
+    assert related_ids(first) == [second.id]
+    assert related_ids(second) == [first.id]
+
+    first.content = text('helm clusters')
+    db.session.commit()
+    update_related_posts(first)
+    assert related_ids(first) == [second.id]
+    assert related_ids(second) == [first.id]
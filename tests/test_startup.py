@@ -0,0 +1,47 @@
+import os
+import re
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Heavy packages that are only needed by some views or CLI commands, and
+# must not be imported when a web worker (or any 'flask' command) starts.
+LAZY_IMPORTS = ['alembic', 'flask_migrate', 'PIL', 'wtforms', 'flask_wtf', 'aiosmtplib']
+# What 'import run' may add on top of Flask and Flask-SQLAlchemy, as a
+# fraction of their own import time. It is about 0.12 now, and was about
+# 0.5 before imports were deferred. A ratio does not depend on how fast
+# the machine is.
+IMPORT_TIME_RATIO_BUDGET = 0.3
+
+
+def import_times(code):
+    """Runs code with -X importtime and returns {module: cumulative microseconds}."""
+    output = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                            capture_output=True, text=True, check=True).stderr
+    times = {}
+    for line in output.splitlines():
+        match = re.match(r'import time:\s+\d+ \|\s+(\d+) \| ( *)(\S+)$', line)
+        if match:
+            times[match.group(3)] = int(match.group(1))
+    return times
+
+
+def test_heavy_packages_are_not_imported_at_startup():
+    imported = {name.split('.')[0] for name in import_times('import run')}
+    expected_absent = LAZY_IMPORTS[:]
+    # python-dotenv is only imported when there is a .env file to load.
+    if not os.path.exists(os.path.join(ROOT, '.env')):
+        expected_absent.append('dotenv')
+    assert imported.isdisjoint(expected_absent), imported & set(expected_absent)
+
+
+def test_startup_import_time_is_within_budget():
+    # Flask and Flask-SQLAlchemy are imported first, so the time for 'run'
+    # is only what the app itself adds. The best of a few runs is used, so
+    # a busy machine does not fail the test.
+    ratios = []
+    for _ in range(3):
+        times = import_times('import flask, flask_sqlalchemy; import run')
+        ratios.append(times['run'] / (times['flask'] + times['flask_sqlalchemy']))
+    assert min(ratios) < IMPORT_TIME_RATIO_BUDGET, f"'import run' took {min(ratios):.2f}x the framework imports"
@@ -0,0 +1,106 @@
+import io
+import json
+import os
+import struct
+import subprocess
+import sys
+import zlib
+from PIL import Image
+from app.routes import save_picture
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def png_bomb(width, height):
+    """
+    A valid, all-black greyscale PNG that is tiny on disk but would take
+    width x height bytes to decode. Rows are compressed one at a time, so
+    building it does not need that memory either.
+    """
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+
+    compressor = zlib.compressobj(9)
+    row = bytes(width + 1)  # filter byte + one byte per pixel
+    data = b''.join(compressor.compress(row) for _ in range(height)) + compressor.flush()
+    header = struct.pack('>IIBBBBB', width, height, 8, 0, 0, 0, 0)
+    return b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header) + chunk(b'IDAT', data) + chunk(b'IEND', b'')
+
+
+def post_image(client, data, filename):
+    return client.post('/create_post', data={
+        'title': 'A post',
+        'content': 'Some content',
+        'image_upload': (io.BytesIO(data), filename),
+    }, content_type='multipart/form-data')
+
+
+def test_oversized_image_is_rejected_with_message(admin_client):
+    response = post_image(admin_client, png_bomb(10000, 5000), 'big.png')
+    assert response.status_code == 200
+    assert b'This image is too large (10000x5000 pixels).' in response.data
+
+
+def test_invalid_image_is_rejected_with_message(admin_client):
+    response = post_image(admin_client, b'not an image at all', 'junk.png')
+    assert response.status_code == 200
+    assert b'This file is not a valid image.' in response.data
+
+
+def test_request_over_max_content_length_is_rejected(app, admin_client):
+    body = bytes(app.config['MAX_CONTENT_LENGTH'] + 1)
+    response = post_image(admin_client, body, 'huge.png')
+    assert response.status_code == 413
+
+
+def test_picture_is_saved_with_its_real_extension(app):
+    upload = io.BytesIO()
+    Image.new('RGBA', (20, 10)).save(upload, 'PNG')
+    upload.seek(0)
+    upload.filename = 'photo.jpg'
+    filename = save_picture(upload)
+    assert filename.endswith('.png')
+    assert os.path.exists(os.path.join(app.config['UPLOAD_FOLDER'], filename))
+
+
+# Runs in a fresh interpreter, so the peak RSS it reports is not
+# inflated by whatever other tests did in this process.
+PEAK_MEMORY_SCRIPT = """
+import io, json, resource, sys
+sys.path[:0] = [{root!r}, {tests!r}]
+from conftest import TestConfig
+from test_uploads import png_bomb, post_image
+from app import create_app, db
+from app.models import User
+
+class ScriptConfig(TestConfig):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+app = create_app(ScriptConfig)
+with app.app_context():
+    db.create_all()
+    admin = User(username='admin', email='admin@example.com', is_admin=True)
+    db.session.add(admin)
+    db.session.commit()
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(admin.id)
+    bomb = png_bomb(10000, 5000)
+    # Warm up, so imports and template compilation are not counted.
+    post_image(client, b'junk', 'junk.png')
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    response = post_image(client, bomb, 'bomb.png')
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'status': response.status_code, 'rejected': b'too large' in response.data,
+                  'peak_growth_kb': after - before}}))
+"""
+
+
+def test_image_bomb_upload_has_bounded_peak_memory():
+    script = PEAK_MEMORY_SCRIPT.format(root=ROOT, tests=os.path.join(ROOT, 'tests'))
+    output = subprocess.run([sys.executable, '-c', script], cwd=ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    result = json.loads(output.splitlines()[-1])
+    assert result['status'] == 200
+    assert result['rejected']
+    # Decoding the 10000x5000 image would need at least 50 MB.
+    assert result['peak_growth_kb'] < 20 * 1024